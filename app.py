@@ -1,14 +1,32 @@
 import os
+import atexit
 import json
-import tempfile
-from datetime import datetime, timedelta
-
-from flask import Flask, render_template, request, redirect, url_for, session, flash, Response, abort
+import hashlib
+import pickle
+import time
+import uuid
+import itertools
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from flask import Flask, render_template, stream_template, request, redirect, url_for, session, flash, Response, abort, g
+from flask_session import Session
+from flask_compress import Compress
 from dotenv import load_dotenv
 import mysql.connector
-from werkzeug.security import generate_password_hash, check_password_hash
+import mysql.connector.pooling
+from werkzeug.security import check_password_hash
+from werkzeug.utils import secure_filename
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.executors.pool import ThreadPoolExecutor as JobThreadPoolExecutor
 from hdfs import InsecureClient  # HDFS client library
+from hdfs.util import HdfsError
+import requests
+from requests.adapters import HTTPAdapter
+import redis
 import mimetypes
 import secrets  # For secure secret key generation
 
@@ -20,31 +38,259 @@ app = Flask(__name__)
 app.secret_key = os.getenv("SECRET_KEY")
 app.permanent_session_lifetime = timedelta(minutes=10)
 
-hdfs_client = InsecureClient(os.getenv("HDFS_NAMENODE"), os.getenv("HDFS_USER"))
+# One HDFS client per worker process, with a keep-alive connection pool large enough for every request thread
+hdfs_session = requests.Session()
+hdfs_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=2)
+hdfs_session.mount("http://", hdfs_adapter)
+hdfs_session.mount("https://", hdfs_adapter)
+hdfs_client = InsecureClient(os.getenv("HDFS_NAMENODE"), os.getenv("HDFS_USER"), session=hdfs_session)
+
+# Redis read-through cache for rarely changing PROPERTIES/AMENITIES lists
+redis_client = redis.Redis(connection_pool=redis.BlockingConnectionPool.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0")))
+CACHE_TTL = int(os.getenv("CACHE_TTL", "120"))
+
+# Server-side sessions in Redis; the cookie only carries the session id
+app.config.update(
+    SESSION_TYPE="redis",
+    SESSION_REDIS=redis_client,
+    SESSION_PERMANENT=True,
+    PERMANENT_SESSION_LIFETIME=timedelta(minutes=10)
+)
+Session(app)
+
+# Compress HTML/JSON responses, preferring brotli when the client supports it
+app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+# Compressing a streamed response would buffer all of it first, so streamed pages (room_status) go out uncompressed
+app.config["COMPRESS_STREAMS"] = False
+Compress(app)
+
+
+# Argon2 password hashing with per-deployment cost parameters. Legacy Werkzeug hashes and
+# hashes made with other parameters are upgraded on the next successful login.
+password_hasher = PasswordHasher(
+    time_cost=int(os.getenv("ARGON2_TIME_COST", "2")),
+    memory_cost=int(os.getenv("ARGON2_MEMORY_COST", "65536")),
+    parallelism=int(os.getenv("ARGON2_PARALLELISM", "2"))
+)
+# Caps concurrent argon2 work (each hash also takes ARGON2_MEMORY_COST KiB). The pool is per process, so
+# the cores are split across the WEB_WORKERS gunicorn processes to keep the host at one hash per core.
+# The calling request thread still blocks on .result(); the pool only queues hashes beyond that.
+HASH_POOL = ThreadPoolExecutor(max_workers=max(1, os.cpu_count() // int(os.getenv("WEB_WORKERS", "1"))))
+
+# Property image uploads to HDFS run in the background so add_property can respond immediately
+# Each worker holds a pooled MySQL connection while recording the result; gunicorn.conf.py counts them in DB_POOL_SIZE
+UPLOAD_POOL = ThreadPoolExecutor(max_workers=int(os.getenv("UPLOAD_WORKERS", "4")))
+
+
+# Database connection pool, shared by every route and scheduled job.
+# get_connection() raises instead of waiting when the pool is empty, so size it for request threads plus jobs.
+POOL = mysql.connector.pooling.MySQLConnectionPool(
+    pool_name="stayngo",
+    pool_size=int(os.getenv("DB_POOL_SIZE", "16")),
+    pool_reset_session=True,
+    host=os.getenv("DB_HOST"),
+    database=os.getenv("DB_NAME"),
+    user=os.getenv("DB_USER"),
+    password=os.getenv("DB_PASSWORD"),
+    autocommit=False
+)
+# Pooled connections older than this many seconds are reopened (like SQLAlchemy's pool_recycle)
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "3600"))
+_connection_opened_at = {}  # MySQL connection id -> time.monotonic() when it was opened
 
 
 # Database connection function
 def create_connection():
-    """Establishes a connection to the MySQL database."""
-    return mysql.connector.connect(
-        host=os.getenv("DB_HOST"),
-        database=os.getenv("DB_NAME"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD")
-    )
-
-def upload_file_to_hdfs(local_path, hdfs_path):
-    with open(local_path, 'rb') as local_file:
-        hdfs_client.write(hdfs_path, local_file, overwrite=True)
+    """Checks out a pooled connection; conn.close() returns it to the pool."""
+    conn = POOL.get_connection()
+    connection_id = conn.connection_id
+    now = time.monotonic()
+    opened_at = _connection_opened_at.setdefault(connection_id, now)
+    # get_connection() already revives dropped connections (is_connected() pings), so only age is checked here
+    if now - opened_at > POOL_RECYCLE:
+        try:
+            conn.reconnect(attempts=2, delay=1)
+        except Exception:
+            # Hand the slot back, or every failed reconnect during an outage shrinks the pool for good
+            conn.close()
+            raise
+
+    if conn.connection_id != connection_id:
+        _connection_opened_at.pop(connection_id, None)
+        _connection_opened_at[conn.connection_id] = now
+    return conn
+
+def get_db():
+    """Returns this request's pooled connection, checking one out on first use."""
+    if 'db' not in g:
+        g.db = create_connection()
+    return g.db
+
+@app.teardown_request
+def close_db(exception=None):
+    """Returns the request's connection to the pool, including when the handler raised."""
+    conn = g.pop('db', None)
+    if conn is not None:
+        conn.close()
+
+def hash_password(password):
+    """Hashes a password with argon2."""
+    return HASH_POOL.submit(password_hasher.hash, password).result()
+
+def verify_password(stored_hash, password):
+    """Checks a password against an argon2 hash or a legacy Werkzeug pbkdf2 hash."""
+    if not stored_hash.startswith('$argon2'):
+        return HASH_POOL.submit(check_password_hash, stored_hash, password).result()
+    try:
+        return HASH_POOL.submit(password_hasher.verify, stored_hash, password).result()
+    except (VerificationError, InvalidHashError):
+        return False
+
+def password_needs_rehash(stored_hash):
+    """True for legacy hashes and argon2 hashes made with outdated parameters."""
+    return not stored_hash.startswith('$argon2') or password_hasher.check_needs_rehash(stored_hash)
+
+def cached_query(cursor, key, query, params=()):
+    """Returns the rows for a query from Redis, running it on MySQL and caching it on a miss."""
+    try:
+        cached = redis_client.get(key)
+        if cached is not None:
+            return pickle.loads(cached)
+    except redis.RedisError as err:
+        print(f"Cache read failed for {key}: {err}")
+
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+
+    try:
+        redis_client.setex(key, CACHE_TTL, pickle.dumps(rows))
+    except redis.RedisError as err:
+        print(f"Cache write failed for {key}: {err}")
+    return rows
+
+def invalidate_cache(*keys):
+    """Drops cached query results after the underlying rows change."""
+    try:
+        redis_client.delete(*keys)
+    except redis.RedisError as err:
+        print(f"Cache invalidation failed for {keys}: {err}")
+
+def invalidate_room_status(*property_ids, all_properties=False):
+    """Retires cached room_status pages by bumping the version their keys are built from."""
+    version_keys = [f"rs:{property_id}:v" for property_id in property_ids]
+    if all_properties:
+        version_keys.append("rs:v")
+    try:
+        pipe = redis_client.pipeline()
+        for key in version_keys:
+            pipe.incr(key)
+        pipe.execute()
+    except redis.RedisError as err:
+        print(f"Cache invalidation failed for {version_keys}: {err}")
+
+def matching_etag(etag):
+    """Returns the form of etag the client sent in If-None-Match, or None.
+
+    Flask-Compress rewrites the ETag of a compressed response to "<etag>:<algorithm>", so those forms match too.
+    """
+    for candidate in [etag] + [f"{etag}:{algorithm}" for algorithm in app.config["COMPRESS_ALGORITHM"]]:
+        if request.if_none_match.contains(candidate):
+            return candidate
+    return None
+
+def render_with_etag(template_name, **context):
+    """Renders a page with an ETag of its data; returns 304 without rendering when the client copy is current."""
+    etag = hashlib.md5(repr((template_name, context)).encode()).hexdigest()
+    client_etag = matching_etag(etag)
+    if client_etag:
+        response = Response(status=304)
+        etag = client_etag
+    else:
+        response = Response(render_template(template_name, **context))
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+def upload_file_to_hdfs(fileobj, hdfs_path):
+    """Streams bytes or a file-like object (e.g. an upload's stream) straight into HDFS."""
+    hdfs_client.write(hdfs_path, fileobj, overwrite=True, buffersize=1 << 20)
+
+IMAGE_STATUS_ATTEMPTS = 4
+
+def upload_property_image(property_id, owner_id, data, hdfs_path):
+    """Background task: uploads a property image and publishes its URL once it is in HDFS."""
+    try:
+        upload_file_to_hdfs(data, hdfs_path)
+        image_url, image_status = hdfs_path, 'ready'
+    except Exception as e:
+        print(f"Error uploading image for property {property_id} to HDFS: {e}")
+        image_url, image_status = None, 'failed'
+
+    # The file is already in HDFS at this point, so a busy pool or a DB blip is retried rather than dropped
+    for attempt in range(1, IMAGE_STATUS_ATTEMPTS + 1):
+        try:
+            conn = create_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("UPDATE PROPERTIES SET image_url = %s, image_status = %s WHERE property_id = %s",
+                               (image_url, image_status, property_id))
+                conn.commit()
+            finally:
+                conn.close()
+            break
+        except Exception as e:
+            print(f"Error updating image status for property {property_id} (attempt {attempt}): {e}")
+            if attempt < IMAGE_STATUS_ATTEMPTS:
+                time.sleep(2 ** attempt)
+    # If every attempt failed the row stays 'pending' until fail_stale_image_uploads marks it 'failed'
+    invalidate_cache("props:all", f"props:owner:{owner_id}", f"prop:{property_id}")
+
+def log_upload_failure(future):
+    """Done-callback for UPLOAD_POOL futures, which nothing else ever waits on."""
+    if future.exception() is not None:
+        print(f"Background image upload failed: {future.exception()}")
+
+def stream_file_from_hdfs(hdfs_path, chunk_size=1 << 20):
+    """Yields an HDFS file in chunks so it is never held in memory whole."""
+    with hdfs_client.read(hdfs_path, chunk_size=chunk_size) as reader:
+        yield from reader
+
+def property_image_path(property_id, filename):
+    """Returns a fresh HDFS path for a property's image, so uploads never share or overwrite a file."""
+    extension = os.path.splitext(secure_filename(filename))[1].lower()
+    return f"/staynngo/property_images/{property_id}/{uuid.uuid4().hex}{extension}"
 
 def delete_file_from_hdfs(hdfs_path):
     if hdfs_client.status(hdfs_path, strict=False):
         hdfs_client.delete(hdfs_path)
 
 
+ANALYTICS_HDFS_PATH = '/staynngo/analytics/summary.json'
+
+# Last generated analytics page context, served by /analytics without touching HDFS.
+# 'etag' fingerprints the source tables so unchanged data is not recomputed.
+_analytics_cache = {"etag": None, "context": None, "ts": 0}
+# How long a worker that doesn't run the scheduler serves its copy of the HDFS file before re-reading it
+ANALYTICS_REFRESH_SECONDS = 300
+
+
+def analytics_template_context(stats):
+    """Builds the analytics.html context, with the chart series pre-serialized for the template."""
+    monthly_trend = stats.get('monthly_trend', [])
+    chart_labels = stats.get('chart_labels', [item['month'] for item in monthly_trend])
+    chart_values = stats.get('chart_values', [item['count'] for item in monthly_trend])
+    return {
+        'stats': stats,
+        'chart_labels': json.dumps(chart_labels),
+        'chart_values': json.dumps(chart_values)
+    }
+
+
 def generate_analytics_data():
     """
     Connects to the database, calculates key metrics, and saves them to HDFS.
+    Skips the aggregates and the HDFS write when the source tables are unchanged since the last run.
     """
     print("Starting analytics data generation...")
     conn = create_connection()
@@ -53,6 +299,18 @@ def generate_analytics_data():
     analytics_data = {}
 
     try:
+        # Cheap change detection: latest modification time and row count of every source table
+        cursor.execute("""
+            SELECT
+                (SELECT MAX(updated_at) FROM BOOKINGS) AS bookings_updated, (SELECT COUNT(*) FROM BOOKINGS) AS bookings_rows,
+                (SELECT MAX(updated_at) FROM PAYMENTS) AS payments_updated, (SELECT COUNT(*) FROM PAYMENTS) AS payments_rows,
+                (SELECT MAX(updated_at) FROM USERS) AS users_updated, (SELECT COUNT(*) FROM USERS) AS users_rows
+        """)
+        etag = hashlib.md5(repr(tuple(cursor.fetchone().values())).encode()).hexdigest()
+        if etag == _analytics_cache["etag"]:
+            print("Analytics source data unchanged, skipping regeneration.")
+            return
+
         # 1. Total Transaction Value
         cursor.execute("SELECT SUM(amount) AS total_transactions FROM PAYMENTS WHERE payment_status = 'completed'")
         total_transactions = cursor.fetchone()['total_transactions']
@@ -80,17 +338,23 @@ def generate_analytics_data():
         """)
         monthly_trend = cursor.fetchall()
         analytics_data['monthly_trend'] = monthly_trend
+        analytics_data['chart_labels'] = [item['month'] for item in monthly_trend]
+        analytics_data['chart_values'] = [item['count'] for item in monthly_trend]
+
+        # /analytics is served from this in-process copy; the HDFS file is only its fallback.
+        # The fingerprint travels with the file so workers reading it can answer revalidations with 304 too.
+        analytics_data['fingerprint'] = etag
+        _analytics_cache.update(etag=etag, context=analytics_template_context(analytics_data), ts=time.time())
 
         # Convert the dictionary to a JSON string
         json_data = json.dumps(analytics_data, indent=4)
         
-        # Define the HDFS path
-        hdfs_path = '/staynngo/analytics/summary.json'
-        
-        # Write the JSON data to HDFS
-        hdfs_client.write(hdfs_path, data=json_data.encode('utf-8'), overwrite=True)
-        
-        print(f"Analytics data successfully generated and saved to HDFS at {hdfs_path}")
+        # Write the JSON data to HDFS (best-effort: a failed write must not discard the fresh in-process copy)
+        try:
+            hdfs_client.write(ANALYTICS_HDFS_PATH, data=json_data.encode('utf-8'), overwrite=True)
+            print(f"Analytics data successfully generated and saved to HDFS at {ANALYTICS_HDFS_PATH}")
+        except Exception as e:
+            print(f"Analytics data generated, but saving it to HDFS failed: {e}")
 
     except mysql.connector.Error as err:
         print(f"Database error during analytics generation: {err}")
@@ -103,31 +367,170 @@ def generate_analytics_data():
 # Function to check for completed bookings and update room availability
 def update_room_availability():
     conn = create_connection()
-    cursor = conn.cursor(dictionary=True)
+    cursor = conn.cursor()
     current_time = datetime.now()
     try:
-        cursor.execute("SELECT room_id FROM BOOKINGS WHERE check_out_date <= %s AND booking_status = 'confirmed'", (current_time,))
-        expired_bookings = cursor.fetchall()
-        for booking in expired_bookings:
-            cursor.execute("UPDATE ROOMS SET availability_status = TRUE WHERE room_id = %s", (booking['room_id'],))
-            cursor.execute("UPDATE BOOKINGS SET booking_status = 'completed' WHERE room_id = %s AND check_out_date <= %s AND booking_status = 'confirmed'", (booking['room_id'], current_time))
-        if expired_bookings:
-            conn.commit()
+        # Free the rooms and complete their expired bookings in a single set-based statement
+        cursor.execute("""
+            UPDATE ROOMS rm
+            JOIN BOOKINGS b ON b.room_id = rm.room_id
+            SET rm.availability_status = TRUE, b.booking_status = 'completed'
+            WHERE b.check_out_date <= %s AND b.booking_status = 'confirmed'
+        """, (current_time,))
+        conn.commit()
+        print(f"Room availability updated ({cursor.rowcount} rows changed)")
+        if cursor.rowcount:
+            # Completed bookings change is_booked on room_status pages across properties
+            invalidate_room_status(all_properties=True)
     except mysql.connector.Error as err:
         print(f"Error updating room availability: {err}")
     finally:
         conn.close()
 
-# Initialize and start the scheduler
-scheduler = BackgroundScheduler()
-try:
-    scheduler.start()
-except Exception as e:
-    print(f"Failed to start the scheduler: {e}")
+IMAGE_UPLOAD_TIMEOUT_MINUTES = int(os.getenv("IMAGE_UPLOAD_TIMEOUT_MINUTES", "30"))
+
+# Function to fail image uploads that never finished, e.g. because the worker restarted with them queued
+def fail_stale_image_uploads():
+    conn = create_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT property_id, owner_id FROM PROPERTIES WHERE image_status = 'pending' AND updated_at < NOW() - INTERVAL %s MINUTE",
+                       (IMAGE_UPLOAD_TIMEOUT_MINUTES,))
+        stale = cursor.fetchall()
+        if stale:
+            placeholders = ", ".join(["%s"] * len(stale))
+            cursor.execute(f"UPDATE PROPERTIES SET image_status = 'failed' WHERE image_status = 'pending' AND property_id IN ({placeholders})",
+                           [property_id for property_id, _ in stale])
+            conn.commit()
+            print(f"Marked {cursor.rowcount} stale image uploads as failed")
+            invalidate_cache("props:all", *{f"props:owner:{owner_id}" for _, owner_id in stale},
+                             *(f"prop:{property_id}" for property_id, _ in stale))
+    except mysql.connector.Error as err:
+        print(f"Error failing stale image uploads: {err}")
+    finally:
+        conn.close()
+
+REVIEW_QUEUE = "q:reviews"
+REVIEW_BATCH_SIZE = 100
 
-scheduler.add_job(func=update_room_availability, trigger="interval", hours=1)
-# NOTE: The interval below is set for frequent testing. Change to a larger value (e.g., hours=24) for production.
-scheduler.add_job(func=generate_analytics_data, trigger="interval", seconds=10)
+def requeue_reviews(payloads):
+    """Puts unsaved reviews back at the head of the queue, in their original order, for the next flush."""
+    try:
+        redis_client.lpush(REVIEW_QUEUE, *reversed(payloads))
+    except redis.RedisError as err:
+        print(f"Error requeueing {len(payloads)} reviews, logging them instead: {err}")
+        for payload in payloads:
+            print(f"Unsaved review: {payload}")
+
+# Function to write queued reviews to the database in batches
+def flush_review_queue():
+    try:
+        payloads = redis_client.lpop(REVIEW_QUEUE, REVIEW_BATCH_SIZE)
+    except redis.RedisError as err:
+        print(f"Error reading the review queue: {err}")
+        return
+    if not payloads:
+        return
+
+    reviews = []
+    for payload in payloads:
+        review = json.loads(payload)
+        reviews.append((review['room_id'], review['user_id'], review['rating'], review['comment'],
+                        review['created_at'], review['created_at']))
+
+    try:
+        conn = create_connection()
+    except mysql.connector.Error as err:
+        print(f"Error connecting to save queued reviews, requeueing them: {err}")
+        requeue_reviews(payloads)
+        return
+
+    insert_review = "INSERT INTO REVIEWS (room_id, user_id, rating, comment, created_at, updated_at) VALUES (%s, %s, %s, %s, %s, %s)"
+    cursor = conn.cursor()
+    pending = payloads  # popped but not yet committed or rejected
+    try:
+        try:
+            cursor.executemany(insert_review, reviews)
+            conn.commit()
+            pending = []
+        except mysql.connector.OperationalError:
+            raise
+        except mysql.connector.DatabaseError as err:
+            # Constraint, data and CHECK violations (e.g. error 3819, SQLSTATE HY000) reject a row, not the connection
+            conn.rollback()
+            print(f"Error saving queued reviews as a batch, retrying one by one: {err}")
+            # Retry individually so one bad review (e.g. for a deleted room) doesn't drop the whole batch;
+            # the prepared cursor parses the INSERT once and re-executes it per review
+            retry_cursor = conn.cursor(prepared=True)
+            for index, review in enumerate(reviews):
+                try:
+                    retry_cursor.execute(insert_review, review)
+                    conn.commit()
+                except mysql.connector.OperationalError:
+                    raise
+                except mysql.connector.DatabaseError as review_err:
+                    conn.rollback()
+                    print(f"Dropping queued review for room {review[0]}: {review_err}")
+                pending = payloads[index + 1:]
+    except mysql.connector.Error as err:
+        # Only connection-level errors (OperationalError, InterfaceError, PoolError) get here: keep everything not yet committed
+        print(f"Error saving queued reviews, requeueing {len(pending)}: {err}")
+        try:
+            conn.rollback()
+        except mysql.connector.Error:
+            pass
+        requeue_reviews(pending)
+    finally:
+        conn.close()
+    if len(pending) < len(payloads):
+        # The user dashboard's cached property list includes average ratings
+        invalidate_cache("props:all")
+
+# Initialize and start the scheduler. Overdue runs of a job are coalesced into one and a job never
+# overlaps itself; booking expiry gets its own executor so slow analytics runs can't delay it.
+scheduler = BackgroundScheduler(
+    executors={'default': JobThreadPoolExecutor(2), 'maintenance': JobThreadPoolExecutor(1)},
+    job_defaults={'coalesce': True, 'max_instances': 1, 'misfire_grace_time': 30}
+)
+
+def holds_scheduler_lock():
+    """Returns True in the one process per host that should run the scheduled jobs.
+
+    Every gunicorn worker imports this module; only the one holding an exclusive flock on
+    SCHEDULER_LOCK_FILE starts the scheduler. The lock dies with its process, so the worker
+    gunicorn spawns to replace it takes over.
+    """
+    global _scheduler_lock
+    try:
+        import fcntl
+    except ImportError:
+        return True  # No flock (Windows): the development server is a single process anyway
+    _scheduler_lock = open(os.getenv("SCHEDULER_LOCK_FILE", "/tmp/stayngo-scheduler.lock"), "w")
+    try:
+        fcntl.flock(_scheduler_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        _scheduler_lock.close()
+        return False
+
+# SCHEDULER_ENABLED=0 keeps a process (or a whole extra host) from running the jobs at all
+if os.getenv("SCHEDULER_ENABLED", "1") == "1" and holds_scheduler_lock():
+    try:
+        scheduler.start()
+    except Exception as e:
+        print(f"Failed to start the scheduler: {e}")
+
+# Booking expiry can run inside MySQL instead (migrations/002_expire_bookings_event.sql)
+if os.getenv("BOOKING_EXPIRY_EVENT") != "1":
+    scheduler.add_job(func=update_room_availability, trigger="interval", hours=1,
+                      id='update_room_availability', executor='maintenance', replace_existing=True)
+# Runs once at startup to fill the in-process cache, then only recomputes when the source tables change
+scheduler.add_job(func=generate_analytics_data, trigger="interval", minutes=5, next_run_time=datetime.now(),
+                  id='generate_analytics_data', replace_existing=True)
+scheduler.add_job(func=fail_stale_image_uploads, trigger="interval", minutes=10,
+                  id='fail_stale_image_uploads', executor='maintenance', replace_existing=True)
+scheduler.add_job(func=flush_review_queue, trigger="interval", seconds=1,
+                  id='flush_review_queue', replace_existing=True)
 
 
 # --- CORE NAVIGATIONAL ROUTES ---
@@ -148,11 +551,11 @@ def auth():
 @app.route('/register', methods=['POST'])
 def register():
     """Handles user registration."""
-    conn = create_connection()
+    conn = get_db()
     cursor = conn.cursor()
     name = request.form['name']
     email = request.form['email']
-    password = generate_password_hash(request.form['password'])
+    password = hash_password(request.form['password'])
     role = request.form['role']
     phone_number = request.form['phone_number']
     
@@ -163,24 +566,29 @@ def register():
         flash("Account created successfully! Please log in.")
     except mysql.connector.Error as err:
         flash(f"Error: {err}")
-    finally:
-        conn.close()
     return redirect(url_for('auth'))
 
 @app.route('/login', methods=['POST'])
 def login():
     """Handles user login and redirects based on role."""
-    conn = create_connection()
-    cursor = conn.cursor(dictionary=True)
+    conn = get_db()
+    # Buffered so the rehash UPDATE can run on the same connection right after the fetch
+    cursor = conn.cursor(dictionary=True, buffered=True)
     email = request.form['email']
     password = request.form['password']
     role = request.form['role']
     
-    cursor.execute("SELECT * FROM USERS WHERE email=%s AND role=%s", (email, role))
+    cursor.execute("SELECT user_id, name, role, password FROM USERS WHERE email=%s AND role=%s LIMIT 1", (email, role))
     user = cursor.fetchone()
-    conn.close()
 
-    if user and check_password_hash(user['password'], password):
+    if user and verify_password(user['password'], password):
+        if password_needs_rehash(user['password']):
+            try:
+                cursor.execute("UPDATE USERS SET password = %s WHERE user_id = %s", (hash_password(password), user['user_id']))
+                conn.commit()
+            except mysql.connector.Error as err:
+                print(f"Error upgrading password hash for user {user['user_id']}: {err}")
+
         session['logged_in'] = True
         session['user_id'] = user['user_id']
         session['name'] = user['name']
@@ -209,12 +617,12 @@ def logout():
 def dashboard():
     """Displays the admin dashboard for viewing and managing properties."""
     if 'logged_in' in session and session['role'] == 'admin':
-        conn = create_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM PROPERTIES WHERE owner_id = %s", (session['user_id'],))
-        properties = cursor.fetchall()
-        conn.close()
-        return render_template('dashboard.html', properties=properties, name=session['name'], role=session['role'])
+        properties = cached_query(cursor, f"props:owner:{session['user_id']}",
+                                  "SELECT property_id, address, city, state, country, description, image_url, image_status FROM PROPERTIES WHERE owner_id = %s",
+                                  (session['user_id'],))
+        return render_with_etag('dashboard.html', properties=properties, name=session['name'], role=session['role'])
     else:
         flash("Unauthorized access. Please log in.")
         return redirect(url_for('auth'))
@@ -223,46 +631,73 @@ def dashboard():
 def user_dashboard():
     """Displays a list of available properties for regular users."""
     if 'logged_in' in session and session['role'] == 'user':
-        conn = create_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM PROPERTIES")
-        properties = cursor.fetchall()
-        conn.close()
-        return render_template('user_dashboard.html', properties=properties, name=session['name'], role=session['role'])
+        # Room count, starting price and average rating for every property in one grouped query
+        properties = cached_query(cursor, "props:all", """
+            SELECT p.property_id, p.address, p.city, p.state, p.country, p.description, p.image_url,
+                   COUNT(DISTINCT r.room_id) AS room_count,
+                   MIN(r.price_per_night) AS from_price,
+                   AVG(rv.rating) AS avg_rating
+            FROM PROPERTIES p
+            LEFT JOIN ROOMS r ON r.property_id = p.property_id
+            LEFT JOIN REVIEWS rv ON rv.room_id = r.room_id
+            GROUP BY p.property_id
+        """)
+        return render_with_etag('user_dashboard.html', properties=properties, name=session['name'], role=session['role'])
     else:
         flash("Unauthorized access. Please log in.")
         return redirect(url_for('auth'))
 
 @app.route('/analytics')
 def admin_analytics():
-    """Displays the analytics dashboard for admins by fetching data from HDFS."""
+    """Displays the analytics dashboard for admins from the in-process cache, falling back to HDFS."""
     if 'logged_in' not in session or session['role'] != 'admin':
         flash("Unauthorized access. Please log in.")
         return redirect(url_for('auth'))
 
-    hdfs_path = '/staynngo/analytics/summary.json'
-    stats = {
-        'total_transactions': 0, 'user_count': 0, 'bookings_count': 0, 'monthly_trend': []
-    }
-    
-    try:
-        if hdfs_client.status(hdfs_path, strict=False):
-            with hdfs_client.read(hdfs_path) as reader:
-                stats = json.load(reader)
-        else:
-            flash("Analytics data is not yet generated. It will be available after the next scheduled run.")
-    except Exception as e:
-        print(f"Error reading analytics data from HDFS: {e}")
-        flash("Could not retrieve analytics data. Please check the logs.")
-    
-    monthly_trend = stats.get('monthly_trend', [])
-    chart_labels = [item['month'] for item in monthly_trend]
-    chart_values = [item['count'] for item in monthly_trend]
+    context = _analytics_cache["context"]
+    etag = _analytics_cache["etag"]
+    # Only the scheduler process regenerates the in-process copy; other workers re-read the HDFS file it writes
+    if not scheduler.running and time.time() - _analytics_cache["ts"] > ANALYTICS_REFRESH_SECONDS:
+        context = None
 
-    return render_template('analytics.html', 
-                           stats=stats,
-                           chart_labels=json.dumps(chart_labels), 
-                           chart_values=json.dumps(chart_values))
+    if context is None:
+        stats = {
+            'total_transactions': 0, 'user_count': 0, 'bookings_count': 0, 'monthly_trend': []
+        }
+        try:
+            with hdfs_client.read(ANALYTICS_HDFS_PATH) as reader:
+                stats = json.load(reader)
+            if stats.get('fingerprint'):
+                _analytics_cache.update(etag=stats['fingerprint'], context=analytics_template_context(stats), ts=time.time())
+        except HdfsError as e:
+            # Only a missing file means the job hasn't run yet; other HDFS errors (namenode down, permissions) are failures
+            if getattr(e, 'exception', None) == 'FileNotFoundException':
+                print(f"Analytics data not available in HDFS: {e}")
+                flash("Analytics data is not yet generated. It will be available after the next scheduled run.")
+            else:
+                print(f"Error reading analytics data from HDFS: {e}")
+                flash("Could not retrieve analytics data. Please check the logs.")
+        except Exception as e:
+            print(f"Error reading analytics data from HDFS: {e}")
+            flash("Could not retrieve analytics data. Please check the logs.")
+        context = analytics_template_context(stats)
+        etag = stats.get('fingerprint')
+
+    client_etag = matching_etag(etag) if etag else None
+    if client_etag:
+        response = Response(status=304)
+        response.set_etag(client_etag)
+        return response
+
+    response = Response(render_template('analytics.html', **context))
+    if etag:
+        # Repeat polls revalidate with If-None-Match and get a 304 until the next regeneration
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.max_age = 60
+    return response
 
 
 # --- USER BOOKING AND VIEWING ROUTES ---
@@ -273,16 +708,8 @@ def book_room(room_id, property_id):
         flash("Please log in to make a booking.")
         return redirect(url_for('auth'))
 
-    conn = create_connection()
+    conn = get_db()
     cursor = conn.cursor(dictionary=True)
-    
-    cursor.execute("SELECT * FROM ROOMS WHERE room_id = %s", (room_id,))
-    room = cursor.fetchone()
-
-    if not room or not room['availability_status']:
-        flash("This room is currently unavailable.")
-        conn.close()
-        return redirect(url_for('view_more', property_id=property_id))
 
     if request.method == 'POST':
         check_in_date = request.form['check_in_date']
@@ -290,33 +717,56 @@ def book_room(room_id, property_id):
         payment_method = request.form['payment_method']
         user_id = session['user_id']
 
-        check_in = datetime.strptime(check_in_date, '%Y-%m-%d')
-        check_out = datetime.strptime(check_out_date, '%Y-%m-%d')
-        num_days = (check_out - check_in).days
+        # Reject bad dates before opening a transaction; fromisoformat is the C fast path for YYYY-MM-DD
+        try:
+            check_in = date.fromisoformat(check_in_date)
+            check_out = date.fromisoformat(check_out_date)
+        except ValueError:
+            flash("Please enter valid check-in and check-out dates.")
+            return redirect(url_for('book_room', room_id=room_id, property_id=property_id))
 
-        if num_days <= 0:
+        if (check_out - check_in).days <= 0:
             flash("Check-out date must be after the check-in date.")
-            conn.close()
-            return render_template('booking.html', room=room, property_id=property_id)
-            
-        total_price = num_days * room['price_per_night']
+            return redirect(url_for('book_room', room_id=room_id, property_id=property_id))
 
         try:
-            cursor.execute("INSERT INTO BOOKINGS (user_id, room_id, check_in_date, check_out_date, total_price, created_at, updated_at) VALUES (%s, %s, %s, %s, %s, NOW(), NOW())", (user_id, room_id, check_in_date, check_out_date, total_price))
-            booking_id = cursor.lastrowid
-            cursor.execute("INSERT INTO PAYMENTS (booking_id, payment_method, amount, payment_status, payment_date) VALUES (%s, %s, %s, 'completed', NOW())", (booking_id, payment_method, total_price))
-            cursor.execute("UPDATE ROOMS SET availability_status = 0 WHERE room_id = %s", (room_id,))
+            conn.start_transaction(isolation_level='READ COMMITTED')
+            # Lock the room row so concurrent bookings of the same room are serialized
+            cursor.execute("SELECT availability_status, property_id FROM ROOMS WHERE room_id = %s FOR UPDATE", (room_id,))
+            room = cursor.fetchone()
+            if not room or not room['availability_status']:
+                conn.rollback()
+                flash("This room is currently unavailable.")
+                return redirect(url_for('view_more', property_id=property_id))
+
+            write_cursor = conn.cursor()
+            # The price is computed from the stay length in SQL; the dates were validated above
+            write_cursor.execute("""
+                INSERT INTO BOOKINGS (user_id, room_id, check_in_date, check_out_date, total_price, created_at, updated_at)
+                SELECT %s, %s, %s, %s, DATEDIFF(%s, %s) * price_per_night, NOW(), NOW()
+                FROM ROOMS
+                WHERE room_id = %s
+            """, (user_id, room_id, check_in_date, check_out_date, check_out_date, check_in_date, room_id))
+
+            booking_id = write_cursor.lastrowid
+            write_cursor.execute("INSERT INTO PAYMENTS (booking_id, payment_method, amount, payment_status, payment_date) SELECT booking_id, %s, total_price, 'completed', NOW() FROM BOOKINGS WHERE booking_id = %s", (payment_method, booking_id))
+            write_cursor.execute("UPDATE ROOMS SET availability_status = 0 WHERE room_id = %s", (room_id,))
             conn.commit()
+            invalidate_room_status(room['property_id'])
             flash("Booking and payment successful!")
             return redirect(url_for('user_dashboard'))
         except mysql.connector.Error as err:
             conn.rollback()
             flash(f"Error: {err}")
-        finally:
-            conn.close()
-    else:
-        conn.close()
-    
+            return redirect(url_for('book_room', room_id=room_id, property_id=property_id))
+
+    cursor.execute("SELECT room_id, room_type, capacity, price_per_night, availability_status FROM ROOMS WHERE room_id = %s", (room_id,))
+    room = cursor.fetchone()
+
+    if not room or not room['availability_status']:
+        flash("This room is currently unavailable.")
+        return redirect(url_for('view_more', property_id=property_id))
+
     return render_template('booking.html', room=room, property_id=property_id)
 
 @app.route('/view_more/<int:property_id>')
@@ -325,26 +775,38 @@ def view_more(property_id):
         flash("Please log in to view property details.")
         return redirect(url_for('auth'))
         
-    conn = create_connection()
+    conn = get_db()
     cursor = conn.cursor(dictionary=True)
     
-    cursor.execute("SELECT * FROM PROPERTIES WHERE property_id = %s", (property_id,))
-    property_details = cursor.fetchone()
-    
-    cursor.execute("SELECT * FROM AMENITIES WHERE property_id = %s", (property_id,))
-    amenities = cursor.fetchall()
+    property_rows = cached_query(cursor, f"prop:{property_id}",
+                                 "SELECT property_id, address, city, state, country, description, image_url FROM PROPERTIES WHERE property_id = %s",
+                                 (property_id,))
+    property_details = property_rows[0] if property_rows else None
     
-    cursor.execute("SELECT * FROM ROOMS WHERE property_id = %s", (property_id,))
-    rooms = cursor.fetchall()
-    
-    room_reviews = {}
-    for room in rooms:
-        cursor.execute("SELECT r.rating, r.comment, u.name AS user_name, r.created_at FROM REVIEWS r JOIN USERS u ON r.user_id = u.user_id WHERE r.room_id = %s ORDER BY r.created_at DESC", (room['room_id'],))
-        room_reviews[room['room_id']] = cursor.fetchall()
-
-    conn.close()
-    
-    return render_template('view_more.html', property=property_details, amenities=amenities, rooms=rooms, room_reviews=room_reviews)
+    # Amenities, rooms and the reviews for all of them come back from one multi-statement round-trip,
+    # so a cache miss on the property row still keeps the page at two
+    amenities, rooms, reviews = [result.fetchall() for result in cursor.execute("""
+        SELECT amenity_id, name, description
+        FROM AMENITIES
+        WHERE property_id = %s;
+
+        SELECT room_id, room_type, capacity, price_per_night, availability_status
+        FROM ROOMS
+        WHERE property_id = %s;
+
+        SELECT r.room_id, r.rating, r.comment, u.name AS user_name, r.created_at
+        FROM REVIEWS r
+        JOIN USERS u ON r.user_id = u.user_id
+        JOIN ROOMS rm ON rm.room_id = r.room_id
+        WHERE rm.property_id = %s
+        ORDER BY r.room_id, r.created_at DESC
+    """, (property_id, property_id, property_id), multi=True)]
+
+    room_reviews = {room['room_id']: [] for room in rooms}
+    for review in reviews:
+        room_reviews.setdefault(review['room_id'], []).append(review)
+
+    return render_with_etag('view_more.html', property=property_details, amenities=amenities, rooms=rooms, room_reviews=room_reviews)
 
 @app.route('/add_review/<int:room_id>', methods=['POST'])
 def add_review(room_id):
@@ -358,35 +820,58 @@ def add_review(room_id):
     created_at = datetime.now()
     property_id = request.form.get('property_id')
 
-    conn = create_connection()
-    cursor = conn.cursor()
+    # REVIEWS has CHECK (rating BETWEEN 1 AND 5); reject here rather than queue a row MySQL will refuse
+    if not 1 <= rating <= 5:
+        flash("Please choose a rating between 1 and 5.")
+        return redirect(url_for('view_more', property_id=property_id))
 
+    # Reviews are queued in Redis and written in batches by flush_review_queue
+    payload = json.dumps({'room_id': room_id, 'user_id': user_id, 'rating': rating,
+                          'comment': comment, 'created_at': created_at.isoformat(sep=' ')})
     try:
-        cursor.execute("INSERT INTO REVIEWS (room_id, user_id, rating, comment, created_at, updated_at) VALUES (%s, %s, %s, %s, %s, %s)", (room_id, user_id, rating, comment, created_at, created_at))
-        conn.commit()
+        redis_client.rpush(REVIEW_QUEUE, payload)
         flash("Your review has been added.")
-    except mysql.connector.Error as err:
-        print(f"Error: {err}")
-        flash("An error occurred. Please try again.")
-    finally:
-        conn.close()
+    except redis.RedisError as err:
+        print(f"Error queueing review, writing it directly: {err}")
+        conn = get_db()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("INSERT INTO REVIEWS (room_id, user_id, rating, comment, created_at, updated_at) VALUES (%s, %s, %s, %s, %s, %s)", (room_id, user_id, rating, comment, created_at, created_at))
+            conn.commit()
+            flash("Your review has been added.")
+        except mysql.connector.Error as db_err:
+            print(f"Error: {db_err}")
+            flash("An error occurred. Please try again.")
 
     return redirect(url_for('view_more', property_id=property_id))
 
+BOOKINGS_PAGE_SIZE = 20
+
 @app.route('/my_bookings')
 def my_bookings():
     if 'logged_in' not in session or session['role'] != 'user':
         flash("Unauthorized access. Please log in.")
         return redirect(url_for('auth'))
         
-    conn = create_connection()
+    page = max(request.args.get('page', 1, type=int), 1)
+
+    conn = get_db()
     cursor = conn.cursor(dictionary=True)
     
-    cursor.execute("SELECT b.booking_id, b.check_in_date, b.check_out_date, b.total_price, r.room_type, p.address FROM BOOKINGS b JOIN ROOMS r ON b.room_id = r.room_id JOIN PROPERTIES p ON r.property_id = p.property_id WHERE b.user_id = %s", (session['user_id'],))
+    # One extra row tells us whether there is a next page
+    cursor.execute("""
+        SELECT b.booking_id, b.check_in_date, b.check_out_date, b.total_price, r.room_type, p.address
+        FROM BOOKINGS b
+        JOIN ROOMS r ON b.room_id = r.room_id
+        JOIN PROPERTIES p ON r.property_id = p.property_id
+        WHERE b.user_id = %s
+        ORDER BY b.check_in_date DESC, b.booking_id DESC
+        LIMIT %s OFFSET %s
+    """, (session['user_id'], BOOKINGS_PAGE_SIZE + 1, (page - 1) * BOOKINGS_PAGE_SIZE))
     bookings = cursor.fetchall()
-    conn.close()
-    
-    return render_template('my_bookings.html', bookings=bookings)
+
+    has_next = len(bookings) > BOOKINGS_PAGE_SIZE
+    return render_template('my_bookings.html', bookings=bookings[:BOOKINGS_PAGE_SIZE], page=page, has_next=has_next)
 
 @app.route('/cancel_booking/<int:booking_id>', methods=['POST'])
 def cancel_booking(booking_id):
@@ -394,54 +879,79 @@ def cancel_booking(booking_id):
         flash("Unauthorized access. Please log in.")
         return redirect(url_for('auth'))
         
-    conn = create_connection()
-    cursor = conn.cursor(dictionary=True)
+    conn = get_db()
+    cursor = conn.cursor()
+    user_id = session['user_id']
 
     try:
-        cursor.execute("SELECT * FROM BOOKINGS WHERE booking_id = %s AND user_id = %s", (booking_id, session['user_id']))
-        booking = cursor.fetchone()
-
-        if booking:
-            cursor.execute("DELETE FROM PAYMENTS WHERE booking_id = %s", (booking_id,))
-            cursor.execute("UPDATE ROOMS SET availability_status = 1 WHERE room_id = %s", (booking['room_id'],))
-            cursor.execute("DELETE FROM BOOKINGS WHERE booking_id = %s", (booking_id,))
+        # Ownership is enforced in every statement, so they all ship to MySQL as one multi-statement payload.
+        # The leading SELECT finds the property whose cached room_status page has to be dropped.
+        results = cursor.execute("""
+            SELECT rm.property_id FROM BOOKINGS b JOIN ROOMS rm ON rm.room_id = b.room_id WHERE b.booking_id = %s AND b.user_id = %s;
+            DELETE p FROM PAYMENTS p JOIN BOOKINGS b ON p.booking_id = b.booking_id WHERE b.booking_id = %s AND b.user_id = %s;
+            UPDATE ROOMS rm JOIN BOOKINGS b ON rm.room_id = b.room_id SET rm.availability_status = 1 WHERE b.booking_id = %s AND b.user_id = %s;
+            DELETE FROM BOOKINGS WHERE booking_id = %s AND user_id = %s
+        """, (booking_id, user_id) * 4, multi=True)
+        property_ids = []
+        for result in results:
+            if result.with_rows:
+                property_ids = [row[0] for row in result.fetchall()]
+            deleted_bookings = result.rowcount
+
+        if deleted_bookings:
             conn.commit()
+            invalidate_room_status(*property_ids)
             flash("Booking has been successfully canceled.")
         else:
+            conn.rollback()
             flash("Booking not found or you do not have permission to cancel it.")
     except mysql.connector.Error as err:
         conn.rollback()
         flash(f"Error: {err}")
-    finally:
-        conn.close()
 
     return redirect(url_for('my_bookings'))
 
 
 # --- ADMIN CRUD ROUTES (PROPERTIES, AMENITIES, ROOMS) ---
 
+# Content types for the image formats properties are uploaded in; anything else falls back to mimetypes
+mimetypes.init()
+IMAGE_MIME_TYPES = {'.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.png': 'image/png', '.webp': 'image/webp', '.gif': 'image/gif'}
+IMAGE_MAX_AGE = int(os.getenv("IMAGE_MAX_AGE", "3600"))
+
 @app.route('/hdfs_image')
 def hdfs_image_proxy():
     hdfs_path = request.args.get('hdfs_path')
     if not hdfs_path:
         abort(400, "Missing hdfs_path parameter")
     try:
-        mime_type, _ = mimetypes.guess_type(hdfs_path)
-        if not mime_type:
-            mime_type = 'application/octet-stream'
-        with hdfs_client.read(hdfs_path) as reader:
-            image_data = reader.read()
-        return Response(image_data, content_type=mime_type)
+        status = hdfs_client.status(hdfs_path, strict=False)
     except Exception as e:
-        print(f"Error streaming HDFS file {hdfs_path}: {e}")
+        print(f"Error reading HDFS status for {hdfs_path}: {e}")
+        status = None
+    if not status:
         abort(404, "Image not found or an error occurred.")
 
+    etag = str(status['modificationTime'])
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        mime_type = IMAGE_MIME_TYPES.get(os.path.splitext(hdfs_path)[1].lower())
+        if not mime_type:
+            mime_type = mimetypes.guess_type(hdfs_path)[0] or 'application/octet-stream'
+        response = Response(stream_file_from_hdfs(hdfs_path), content_type=mime_type,
+                            headers={'Content-Length': str(status['length'])})
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = IMAGE_MAX_AGE
+    return response
+
 # Property Routes
 @app.route('/add_property', methods=['GET', 'POST'])
 def add_property():
     if 'logged_in' in session and session['role'] == 'admin':
         if request.method == 'POST':
-            conn = create_connection()
+            conn = get_db()
             cursor = conn.cursor()
             owner_id = session['user_id']
             address = request.form['address']
@@ -451,22 +961,22 @@ def add_property():
             description = request.form['description']
 
             file = request.files.get('image_file')
-            if file and file.filename != '':
-                local_path = os.path.join(tempfile.gettempdir(), file.filename)
-                file.save(local_path)
-                hdfs_path = f"/staynngo/property_images/{file.filename}"
-                upload_file_to_hdfs(local_path, hdfs_path)
-                os.remove(local_path)
-            else:
-                hdfs_path = None
-
+            has_image = file and file.filename != ''
             image_description = request.form.get('image_description')
 
-            cursor.execute("INSERT INTO PROPERTIES (owner_id, address, city, state, country, description, image_url, image_description) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
-                           (owner_id, address, city, state, country, description, hdfs_path, image_description))
+            # image_url stays NULL until the background upload has finished
+            cursor.execute("INSERT INTO PROPERTIES (owner_id, address, city, state, country, description, image_url, image_description, image_status) VALUES (%s, %s, %s, %s, %s, %s, NULL, %s, %s)",
+                           (owner_id, address, city, state, country, description, image_description,
+                            'pending' if has_image else 'ready'))
             conn.commit()
             property_id = cursor.lastrowid
-            conn.close()
+            invalidate_cache("props:all", f"props:owner:{owner_id}")
+
+            if has_image:
+                hdfs_path = property_image_path(property_id, file.filename)
+                # The upload stream is closed after the request, so hand the worker the bytes
+                future = UPLOAD_POOL.submit(upload_property_image, property_id, owner_id, file.stream.read(), hdfs_path)
+                future.add_done_callback(log_upload_failure)
             flash("Property added successfully! Now add amenities.")
             return redirect(url_for('add_amenities', property_id=property_id))
         return render_template('add_property.html')
@@ -477,9 +987,10 @@ def add_property():
 @app.route('/edit_property/<int:property_id>', methods=['GET', 'POST'])
 def edit_property(property_id):
     if 'logged_in' in session and session['role'] == 'admin':
-        conn = create_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM PROPERTIES WHERE property_id = %s AND owner_id = %s", (property_id, session['user_id']))
+        cursor.execute("SELECT property_id, address, city, state, country, description, image_url, image_description, image_status FROM PROPERTIES WHERE property_id = %s AND owner_id = %s",
+                       (property_id, session['user_id']))
         property_item = cursor.fetchone()
 
         if request.method == 'POST':
@@ -492,24 +1003,31 @@ def edit_property(property_id):
 
             file = request.files.get('image_file')
             if file and file.filename != '':
-                if property_item['image_url']:
-                    delete_file_from_hdfs(property_item['image_url'])
-                local_path = os.path.join(tempfile.gettempdir(), file.filename)
-                file.save(local_path)
-                hdfs_path = f"/staynngo/property_images/{file.filename}"
-                upload_file_to_hdfs(local_path, hdfs_path)
-                os.remove(local_path)
+                hdfs_path = property_image_path(property_id, file.filename)
+                upload_file_to_hdfs(file.stream, hdfs_path)
+                replaced_image = property_item['image_url']
+                # A direct re-upload also recovers a property whose background upload failed
+                image_status = 'ready'
             else:
                 hdfs_path = property_item['image_url']
+                image_status = property_item['image_status']
+                replaced_image = None
  
-            cursor.execute("UPDATE PROPERTIES SET address = %s, city = %s, state = %s, country = %s, description = %s, image_url = %s, image_description = %s WHERE property_id = %s AND owner_id = %s",
-                           (address, city, state, country, description, hdfs_path, image_description, property_id, session['user_id']))
+            cursor.execute("UPDATE PROPERTIES SET address = %s, city = %s, state = %s, country = %s, description = %s, image_url = %s, image_description = %s, image_status = %s WHERE property_id = %s AND owner_id = %s",
+                           (address, city, state, country, description, hdfs_path, image_description, image_status, property_id, session['user_id']))
             conn.commit()
-            conn.close()
+            invalidate_cache("props:all", f"props:owner:{session['user_id']}", f"prop:{property_id}")
+            invalidate_room_status(property_id)
+            # The old file belonged to this property alone; it is only removed once the row points at its replacement.
+            # The update is already committed, so a failed cleanup only leaves an orphaned file behind.
+            if replaced_image:
+                try:
+                    delete_file_from_hdfs(replaced_image)
+                except Exception as e:
+                    print(f"Failed to delete replaced image {replaced_image} from HDFS: {e}")
             flash("Property updated successfully!")
             return redirect(url_for('dashboard'))
 
-        conn.close()
         return render_template('edit_property.html', property=property_item)
     else:
         flash("Unauthorized access. Please log in.")
@@ -518,12 +1036,10 @@ def edit_property(property_id):
 @app.route('/delete_property/<int:property_id>', methods=['POST'])
 def delete_property(property_id):
     if 'logged_in' in session and session['role'] == 'admin':
-        conn = create_connection()
+        conn = get_db()
         cursor = conn.cursor()
         try:
-            conn.start_transaction()
-            cursor.execute("DELETE FROM ROOMS WHERE property_id = %s", (property_id,))
-            cursor.execute("DELETE FROM AMENITIES WHERE property_id = %s", (property_id,))
+            # ROOMS and AMENITIES reference PROPERTIES with ON DELETE CASCADE, so MySQL removes them in the same statement
             cursor.execute("DELETE FROM PROPERTIES WHERE property_id = %s AND owner_id = %s", (property_id, session['user_id']))
             
             if cursor.rowcount == 0:
@@ -531,12 +1047,13 @@ def delete_property(property_id):
                 flash("Property not found or you don't have permission to delete it.")
             else:
                 conn.commit()
+                invalidate_cache("props:all", f"props:owner:{session['user_id']}",
+                                 f"prop:{property_id}", f"prop:{property_id}:amenities")
+                invalidate_room_status(property_id)
                 flash("Property and its associated rooms and amenities were deleted successfully!")
         except mysql.connector.Error as err:
             conn.rollback()
             flash(f"Error deleting property: {err}")
-        finally:
-            conn.close()
         return redirect(url_for('dashboard'))
     else:
         flash("Unauthorized access. Please log in.")
@@ -547,15 +1064,18 @@ def delete_property(property_id):
 def add_amenities(property_id):
     if 'logged_in' in session and session['role'] == 'admin':
         if request.method == 'POST':
-            conn = create_connection()
+            conn = get_db()
             cursor = conn.cursor()
-            amenity_name = request.form['amenity_name']
-            amenity_description = request.form['amenity_description']
-            cursor.execute("INSERT INTO AMENITIES (property_id, name, description) VALUES (%s, %s, %s)",
-                           (property_id, amenity_name, amenity_description))
-            conn.commit()
-            conn.close()
-            flash("Amenity added successfully!")
+            amenity_names = request.form.getlist('amenity_name')
+            amenity_descriptions = request.form.getlist('amenity_description')
+            # One multi-row INSERT for every amenity submitted with the form
+            amenities = [(property_id, name, description)
+                         for name, description in zip(amenity_names, amenity_descriptions) if name.strip()]
+            if amenities:
+                cursor.executemany("INSERT INTO AMENITIES (property_id, name, description) VALUES (%s, %s, %s)", amenities)
+                conn.commit()
+            invalidate_cache(f"prop:{property_id}:amenities")
+            flash("Amenities added successfully!")
             return redirect(url_for('add_amenities', property_id=property_id))
         return render_template('add_amenities.html', property_id=property_id)
     else:
@@ -565,11 +1085,10 @@ def add_amenities(property_id):
 @app.route('/view_amenities/<int:property_id>')
 def view_amenities(property_id):
     if 'logged_in' in session and session['role'] == 'admin':
-        conn = create_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM AMENITIES WHERE property_id = %s", (property_id,))
-        amenities = cursor.fetchall()
-        conn.close()
+        amenities = cached_query(cursor, f"prop:{property_id}:amenities",
+                                 "SELECT amenity_id, name, description FROM AMENITIES WHERE property_id = %s", (property_id,))
         return render_template('view_amenities.html', amenities=amenities, property_id=property_id)
     else:
         flash("Unauthorized access. Please log in.")
@@ -578,9 +1097,9 @@ def view_amenities(property_id):
 @app.route('/edit_amenity/<int:amenity_id>', methods=['GET', 'POST'])
 def edit_amenity(amenity_id):
     if 'logged_in' in session and session['role'] == 'admin':
-        conn = create_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM AMENITIES WHERE amenity_id = %s", (amenity_id,))
+        cursor.execute("SELECT amenity_id, property_id, name, description FROM AMENITIES WHERE amenity_id = %s", (amenity_id,))
         amenity = cursor.fetchone()
         
         if request.method == 'POST':
@@ -589,11 +1108,10 @@ def edit_amenity(amenity_id):
             cursor.execute("UPDATE AMENITIES SET name = %s, description = %s WHERE amenity_id = %s",
                            (amenity_name, amenity_description, amenity_id))
             conn.commit()
-            conn.close()
+            invalidate_cache(f"prop:{amenity['property_id']}:amenities")
             flash("Amenity updated successfully!")
             return redirect(url_for('view_amenities', property_id=amenity['property_id']))
         
-        conn.close()
         return render_template('edit_amenity.html', amenity=amenity)
     else:
         flash("Unauthorized access. Please log in.")
@@ -602,16 +1120,15 @@ def edit_amenity(amenity_id):
 @app.route('/delete_amenity/<int:amenity_id>', methods=['POST'])
 def delete_amenity(amenity_id):
     if 'logged_in' in session and session['role'] == 'admin':
-        conn = create_connection()
+        conn = get_db()
         cursor = conn.cursor()
         try:
             cursor.execute("DELETE FROM AMENITIES WHERE amenity_id = %s", (amenity_id,))
             conn.commit()
+            invalidate_cache(f"prop:{request.form['property_id']}:amenities")
             flash("Amenity deleted successfully!")
         except mysql.connector.Error as err:
             flash(f"Error deleting amenity: {err}")
-        finally:
-            conn.close()
         return redirect(url_for('view_amenities', property_id=request.form['property_id']))
     else:
         flash("Unauthorized access. Please log in.")
@@ -622,7 +1139,7 @@ def delete_amenity(amenity_id):
 def add_room(property_id):
     if 'logged_in' in session and session['role'] == 'admin':
         if request.method == 'POST':
-            conn = create_connection()
+            conn = get_db()
             cursor = conn.cursor()
             room_type = request.form['room_type']
             capacity = request.form['capacity']
@@ -632,7 +1149,8 @@ def add_room(property_id):
             cursor.execute("INSERT INTO ROOMS (property_id, room_type, capacity, price_per_night, availability_status) VALUES (%s, %s, %s, %s, %s)",
                            (property_id, room_type, capacity, price_per_night, availability_status))
             conn.commit()
-            conn.close()
+            invalidate_cache("props:all")
+            invalidate_room_status(property_id)
             flash("Room added successfully!")
             return redirect(url_for('view_rooms', property_id=property_id))
         
@@ -644,11 +1162,10 @@ def add_room(property_id):
 @app.route('/view_rooms/<int:property_id>')
 def view_rooms(property_id):
     if 'logged_in' in session and session['role'] == 'admin':
-        conn = create_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM ROOMS WHERE property_id = %s", (property_id,))
+        cursor.execute("SELECT room_id, room_type, capacity, price_per_night, availability_status FROM ROOMS WHERE property_id = %s", (property_id,))
         rooms = cursor.fetchall()
-        conn.close()
         return render_template('view_rooms.html', rooms=rooms, property_id=property_id)
     else:
         flash("Unauthorized access. Please log in.")
@@ -657,9 +1174,9 @@ def view_rooms(property_id):
 @app.route('/edit_room/<int:room_id>', methods=['GET', 'POST'])
 def edit_room(room_id):
     if 'logged_in' in session and session['role'] == 'admin':
-        conn = create_connection()
+        conn = get_db()
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM ROOMS WHERE room_id = %s", (room_id,))
+        cursor.execute("SELECT room_id, property_id, room_type, capacity, price_per_night, availability_status FROM ROOMS WHERE room_id = %s", (room_id,))
         room = cursor.fetchone()
         
         if request.method == 'POST':
@@ -671,11 +1188,11 @@ def edit_room(room_id):
             cursor.execute("UPDATE ROOMS SET room_type = %s, capacity = %s, price_per_night = %s, availability_status = %s WHERE room_id = %s",
                            (room_type, capacity, price_per_night, availability_status, room_id))
             conn.commit()
-            conn.close()
+            invalidate_cache("props:all")
+            invalidate_room_status(room['property_id'])
             flash("Room updated successfully!")
             return redirect(url_for('view_rooms', property_id=room['property_id']))
         
-        conn.close()
         return render_template('edit_rooms.html', room=room)
     else:
         flash("Unauthorized access. Please log in.")
@@ -684,47 +1201,103 @@ def edit_room(room_id):
 @app.route('/delete_room/<int:room_id>', methods=['POST'])
 def delete_room(room_id):
     if 'logged_in' in session and session['role'] == 'admin':
-        conn = create_connection()
+        conn = get_db()
         cursor = conn.cursor()
         try:
             cursor.execute("DELETE FROM ROOMS WHERE room_id = %s", (room_id,))
             conn.commit()
+            invalidate_cache("props:all")
+            invalidate_room_status(request.form['property_id'])
             flash("Room deleted successfully!")
         except mysql.connector.Error as err:
             flash(f"Error deleting room: {err}")
-        finally:
-            conn.close()
         return redirect(url_for('view_rooms', property_id=request.form['property_id']))
     else:
         flash("Unauthorized access. Please log in.")
         return redirect(url_for('auth'))
         
+# room_status rows as plain tuples: cheaper than a dict per row and still read by attribute in the template
+RoomStatusRow = namedtuple('RoomStatusRow', 'property_id address city room_id room_type capacity price_per_night is_booked')
+ROOM_STATUS_PAGE_SIZE = 50
+# Each room_status page (rows plus pager) is its own Redis key with its own TTL. Keys embed a global and a
+# per-property version, so invalidate_room_status retires every page of a property with one INCR.
+ROOM_STATUS_CACHE_TTL = int(os.getenv("ROOM_STATUS_CACHE_TTL", "30"))
+
 @app.route('/room_status/<int:property_id>')
 def room_status(property_id):
     if 'logged_in' in session and session['role'] == 'admin':
-        conn = create_connection()
-        cursor = conn.cursor(dictionary=True)
-        
-        cursor.execute("SELECT * FROM PROPERTIES WHERE property_id = %s AND owner_id = %s", (property_id, session['user_id']))
-        property_details = cursor.fetchone()
+        # Keyset pagination on the ROOMS primary key: each page is an index range scan from after_room_id
+        after_room_id = max(request.args.get('after_room_id', 0, type=int), 0)
+        limit = min(max(request.args.get('limit', ROOM_STATUS_PAGE_SIZE, type=int), 1), ROOM_STATUS_PAGE_SIZE)
 
-        if not property_details:
+        # Pages are only written after the ownership check passed, so the owner id in the key keeps them per admin
+        cache_key = None
+        try:
+            global_version, property_version = redis_client.mget("rs:v", f"rs:{property_id}:v")
+            cache_key = (f"rs:{property_id}:{int(global_version or 0)}.{int(property_version or 0)}:"
+                         f"{session['user_id']}:{after_room_id}:{limit}")
+            cached = redis_client.get(cache_key)
+            if cached is not None:
+                property_row, room_rows, pager = pickle.loads(cached)
+                return render_template('room_status.html', property=property_row, rooms=room_rows, pager=pager)
+        except redis.RedisError as err:
+            print(f"Cache read failed for room_status {property_id}: {err}")
+
+        conn = get_db()
+        # Unbuffered: rows are pulled from the socket while the template renders instead of being materialized first
+        cursor = conn.cursor(buffered=False)
+        # Ownership check and room list in one query: no rows means the property isn't this admin's
+        cursor.execute("""
+            SELECT p.property_id, p.address, p.city,
+                   r.room_id, r.room_type, r.capacity, r.price_per_night,
+                   EXISTS (
+                       SELECT 1 FROM BOOKINGS b
+                       WHERE b.room_id = r.room_id AND b.check_out_date >= CURDATE() AND b.booking_status = 'confirmed'
+                   ) AS is_booked
+            FROM PROPERTIES p
+            LEFT JOIN ROOMS r ON r.property_id = p.property_id AND r.room_id > %s
+            WHERE p.property_id = %s AND p.owner_id = %s
+            ORDER BY r.room_id
+            LIMIT %s
+        """, (after_room_id, property_id, session['user_id'], limit + 1))
+        first_row = cursor.fetchone()
+
+        if first_row is None:
+            cursor.close()
             flash("Property not found or you do not have permission to view it.")
-            conn.close()
             return redirect(url_for('dashboard'))
 
-        cursor.execute("""
-            SELECT r.room_id, r.room_type, r.capacity, r.price_per_night, r.availability_status,
-                   b.booking_id, b.check_in_date, b.check_out_date, u.name as guest_name
-            FROM ROOMS r
-            LEFT JOIN BOOKINGS b ON r.room_id = b.room_id AND b.booking_status = 'confirmed'
-            LEFT JOIN USERS u ON b.user_id = u.user_id
-            WHERE r.property_id = %s
-        """, (property_id,))
-        rooms = cursor.fetchall()
-        
-        conn.close()
-        return render_template('room_status.html', property=property_details, rooms=rooms)
+        first_row = RoomStatusRow._make(first_row)
+
+        # Filled in by rooms() once it sees the extra row; the template reads it after the loop
+        pager = {'after_room_id': after_room_id, 'limit': limit, 'next_after_room_id': None}
+
+        def rooms():
+            try:
+                # Iterate to the end (at most one extra row) so no unread result is left on the pooled connection
+                shown = []
+                for row in itertools.chain((first_row,), map(RoomStatusRow._make, cursor)):
+                    if row.room_id is None:
+                        # A property without rooms (or past its last room) comes back as one row with NULL room columns
+                        continue
+                    if len(shown) < limit:
+                        shown.append(row)
+                        yield row
+                    else:
+                        pager['next_after_room_id'] = shown[-1].room_id
+            finally:
+                cursor.close()
+
+            # Only a page that streamed to the end is cached
+            if cache_key is None:
+                return
+            try:
+                redis_client.setex(cache_key, ROOM_STATUS_CACHE_TTL, pickle.dumps((first_row, shown, pager)))
+            except redis.RedisError as err:
+                print(f"Cache write failed for {cache_key}: {err}")
+
+        # stream_template keeps the request context, so teardown_request returns the connection after the last row
+        return stream_template('room_status.html', property=first_row, rooms=rooms(), pager=pager)
     else:
         flash("Unauthorized access. Please log in.")
         return redirect(url_for('auth'))
@@ -732,10 +1305,12 @@ def room_status(property_id):
 
 # --- APP SHUTDOWN AND RUN ---
 
-@app.teardown_appcontext
-def shutdown_scheduler(exception=None):
+# Stop the scheduler when the process exits, not after each request's app context
+@atexit.register
+def shutdown_scheduler():
     if scheduler.running:
-        scheduler.shutdown()
+        scheduler.shutdown(wait=False)
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
+    app.run(debug=os.getenv("FLASK_DEBUG") == "1")
\ No newline at end of file
@@ -0,0 +1,21 @@
+# Gunicorn settings for serving StayNGo in production: gunicorn app:app
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_WORKERS", multiprocessing.cpu_count()))
+# app.py divides the cores between the workers when sizing its password hashing pool
+os.environ.setdefault("WEB_WORKERS", str(workers))
+# gthread workers: the password hashing pool and APScheduler rely on real OS threads, and each
+# thread holds at most one pooled MySQL connection (get_connection() fails fast instead of waiting).
+worker_class = "gthread"
+threads = int(os.getenv("WEB_THREADS", "8"))
+keepalive = 5
+timeout = 30
+
+# Each worker process owns its own MySQL pool and get_connection() fails instead of waiting, so give it one
+# connection per thread plus one for every APScheduler executor thread (default 2 + maintenance 1) and
+# every background image upload worker (UPLOAD_WORKERS) that can run in the same process.
+upload_workers = int(os.getenv("UPLOAD_WORKERS", "4"))
+os.environ.setdefault("UPLOAD_WORKERS", str(upload_workers))
+os.environ.setdefault("DB_POOL_SIZE", str(threads + 3 + upload_workers))
@@ -0,0 +1,22 @@
+-- Indexes supporting the queries issued by app.py.
+-- Apply once against the StayNGo database: mysql -u <user> -p <database> < migrations/001_indexes.sql
+-- Where a column already carries InnoDB's implicit foreign key index, the named index below replaces it.
+
+-- Login lookup (login); dropped again by 007, the UNIQUE index on USERS.email already covers it
+CREATE UNIQUE INDEX ix_users_email_role ON USERS(email, role);
+
+-- Properties owned by an admin (dashboard, edit_property, room_status)
+CREATE INDEX ix_properties_owner ON PROPERTIES(owner_id);
+
+-- Rooms and amenities of a property (view_more, view_rooms, view_amenities, room_status)
+CREATE INDEX ix_rooms_property ON ROOMS(property_id);
+CREATE INDEX ix_amenities_property ON AMENITIES(property_id);
+
+-- A user's bookings (my_bookings)
+CREATE INDEX ix_bookings_user ON BOOKINGS(user_id);
+
+-- Current bookings of a room (room_status, update_room_availability)
+CREATE INDEX ix_bookings_room_checkout ON BOOKINGS(room_id, check_out_date);
+
+-- Reviews for a property's rooms, newest first (view_more)
+CREATE INDEX ix_reviews_room_created ON REVIEWS(room_id, created_at DESC);
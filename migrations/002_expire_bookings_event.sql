@@ -0,0 +1,11 @@
+-- Frees rooms and completes expired bookings inside MySQL instead of the app's polling job.
+-- Requires the event scheduler (SET GLOBAL event_scheduler = ON, or event_scheduler=ON in my.cnf).
+-- Once applied, start the app with BOOKING_EXPIRY_EVENT=1 so it skips its own update_room_availability job.
+
+CREATE EVENT IF NOT EXISTS ev_expire_bookings
+ON SCHEDULE EVERY 10 MINUTE
+DO
+    UPDATE ROOMS rm
+    JOIN BOOKINGS b ON b.room_id = rm.room_id
+    SET rm.availability_status = TRUE, b.booking_status = 'completed'
+    WHERE b.check_out_date <= NOW() AND b.booking_status = 'confirmed';
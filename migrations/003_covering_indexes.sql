@@ -0,0 +1,9 @@
+-- Covering indexes for the analytics aggregates and the booking expiry job.
+-- The remaining lookups named alongside these (REVIEWS(room_id, created_at), ROOMS/AMENITIES.property_id,
+-- PROPERTIES.owner_id) are indexed by 001_indexes.sql; BOOKINGS.user_id by 005; USERS.email is UNIQUE in the schema.
+
+-- SUM(amount) of completed payments is answered from the index alone (generate_analytics_data)
+CREATE INDEX ix_payments_status_amount ON PAYMENTS(payment_status, amount);
+
+-- Confirmed bookings past their check-out date (update_room_availability, ev_expire_bookings)
+CREATE INDEX ix_bookings_status_checkout ON BOOKINGS(booking_status, check_out_date);
@@ -0,0 +1,3 @@
+-- Tracks background image uploads: add_property inserts 'pending' and the upload worker sets 'ready' or 'failed'.
+ALTER TABLE PROPERTIES
+    ADD COLUMN image_status ENUM('pending', 'ready', 'failed') NOT NULL DEFAULT 'ready' AFTER image_description;
@@ -0,0 +1,6 @@
+-- A user's bookings newest first, one page at a time (my_bookings)
+CREATE INDEX ix_bookings_user_checkin ON BOOKINGS(user_id, check_in_date);
+
+-- ix_bookings_user(user_id) from 001_indexes.sql is a prefix of the index above, which also
+-- backs the USERS foreign key, so keeping it would only add work to every BOOKINGS write
+DROP INDEX ix_bookings_user ON BOOKINGS;
@@ -0,0 +1,8 @@
+-- Confirmed, not yet checked-out bookings of a room (room_status's EXISTS subquery).
+-- With booking_status ahead of check_out_date the whole predicate is answered from the index.
+-- BOOKINGS(user_id) is indexed by 005 and PROPERTIES(owner_id) by 001_indexes.sql.
+CREATE INDEX ix_bookings_room_status_checkout ON BOOKINGS(room_id, booking_status, check_out_date);
+
+-- Every query that used ix_bookings_room_checkout(room_id, check_out_date) from 001 also filters on
+-- booking_status, so the index above supersedes it (and backs the ROOMS foreign key)
+DROP INDEX ix_bookings_room_checkout ON BOOKINGS;
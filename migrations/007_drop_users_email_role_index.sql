@@ -0,0 +1,4 @@
+-- USERS.email is already UNIQUE in the schema, so login's WHERE email = %s AND role = %s is a single-row
+-- lookup on that index with role checked on the one row it returns. ix_users_email_role from 001 adds
+-- nothing to that read and only costs every insert into USERS a second unique check.
+DROP INDEX ix_users_email_role ON USERS;
@@ -0,0 +1,37 @@
+"""Query-count helper for keeping an eye on per-request round-trip budgets."""
+import contextlib
+
+
+class QueryCounter:
+    """Number of execute/executemany calls seen so far."""
+
+    def __init__(self):
+        self.value = 0
+
+
+@contextlib.contextmanager
+def count_queries(conn):
+    """Counts statements sent through cursors opened on conn while the block runs.
+
+    A multi=True execute or an executemany is one call, i.e. one round-trip.
+    """
+    counter = QueryCounter()
+    original_cursor = conn.cursor
+
+    def counting_cursor(*args, **kwargs):
+        cursor = original_cursor(*args, **kwargs)
+        for name in ('execute', 'executemany'):
+            method = getattr(cursor, name)
+
+            def counted(*call_args, _method=method, **call_kwargs):
+                counter.value += 1
+                return _method(*call_args, **call_kwargs)
+
+            setattr(cursor, name, counted)
+        return cursor
+
+    conn.cursor = counting_cursor
+    try:
+        yield counter
+    finally:
+        conn.cursor = original_cursor
@@ -0,0 +1,122 @@
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+from query_count import count_queries
+
+pytest.importorskip("flask")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeRedis:
+    """Dict-backed stand-in for the few Redis commands the sessions and caches use."""
+
+    def __init__(self, *args, **kwargs):
+        self.data = {}
+
+    def get(self, name):
+        return self.data.get(name)
+
+    def mget(self, *names):
+        return [self.data.get(name) for name in names]
+
+    def setex(self, name, time, value):
+        self.data[name] = value if isinstance(value, bytes) else str(value).encode()
+
+    def delete(self, *names):
+        for name in names:
+            self.data.pop(name, None)
+
+
+class FakeCursor:
+    """Returns rows_for(query) for every statement; multi=True yields one result per statement."""
+
+    def __init__(self, rows_for, rows=()):
+        self.rows_for = rows_for
+        self.rows = list(rows)
+
+    def execute(self, query, params=(), multi=False):
+        if multi:
+            return [FakeCursor(self.rows_for, self.rows_for(statement))
+                    for statement in query.split(';') if statement.strip()]
+        self.rows = list(self.rows_for(query))
+
+    def executemany(self, query, seq_params):
+        self.rows = []
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def __iter__(self):
+        while self.rows:
+            yield self.rows.pop(0)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(scope="module")
+def app_module():
+    # Nothing at import time may reach MySQL, Redis, HDFS or start the scheduled jobs
+    with mock.patch.dict(os.environ, {"SCHEDULER_ENABLED": "0", "SECRET_KEY": "test"}), \
+            mock.patch("mysql.connector.pooling.MySQLConnectionPool"), \
+            mock.patch("redis.Redis", FakeRedis), \
+            mock.patch("hdfs.InsecureClient"):
+        import app
+    return app
+
+
+@pytest.fixture
+def db(app_module):
+    """A fake pooled connection whose cursors answer with rows chosen by the test."""
+    conn = mock.MagicMock()
+    conn.rows_for = lambda query: []
+    conn.cursor.side_effect = lambda *args, **kwargs: FakeCursor(lambda query: conn.rows_for(query))
+    app_module.POOL.get_connection.return_value = conn
+    app_module.redis_client.data.clear()
+    return conn
+
+
+def logged_in_client(app_module, role):
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session.update(logged_in=True, role=role, user_id=7, name="Test")
+    return client
+
+
+def test_room_status_is_one_query_per_page(app_module, db):
+    db.rows_for = lambda query: [(42, "1 Main St", "Springfield", room_id, "Double", 2, 120, 0)
+                                 for room_id in (1, 2, 3)]
+    client = logged_in_client(app_module, "admin")
+
+    with count_queries(db) as queries:
+        response = client.get("/room_status/42")
+        body = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert "1 Main St" in body
+    assert queries.value == 1
+
+
+def test_view_more_needs_at_most_two_queries_on_a_cache_miss(app_module, db):
+    def rows_for(query):
+        if "FROM PROPERTIES" in query:
+            return [{"property_id": 42, "address": "1 Main St", "city": "Springfield", "state": "IL",
+                     "country": "US", "description": "", "image_url": None}]
+        return []
+
+    db.rows_for = rows_for
+    client = logged_in_client(app_module, "user")
+
+    with count_queries(db) as queries:
+        response = client.get("/view_more/42")
+
+    assert response.status_code == 200
+    assert queries.value <= 2
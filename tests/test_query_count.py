@@ -0,0 +1,20 @@
+from unittest import mock
+
+from query_count import count_queries
+
+
+def test_count_queries_counts_each_round_trip():
+    conn = mock.MagicMock()
+    # Like mysql.connector, every cursor() call returns a new cursor
+    conn.cursor.side_effect = lambda *args, **kwargs: mock.MagicMock()
+    original_cursor = conn.cursor
+
+    with count_queries(conn) as queries:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT room_id FROM ROOMS WHERE property_id = %s", (42,))
+        cursor.executemany("INSERT INTO AMENITIES (property_id, name, description) VALUES (%s, %s, %s)",
+                           [(42, 'Wifi', ''), (42, 'Pool', '')])
+        conn.cursor().execute("SELECT 1; SELECT 2", multi=True)
+
+    assert queries.value == 3
+    assert conn.cursor is original_cursor